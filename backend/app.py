@@ -1,15 +1,32 @@
-from flask import Flask, request, jsonify
+from flask import Flask, request, jsonify, send_file
 from flask_cors import CORS
 import mysql.connector
+import rollups
 from werkzeug.security import generate_password_hash, check_password_hash
 import jwt
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+import threading
+import mimetypes
+import gzip
 import os
 import json
 
+try:
+    import brotli  # Optional - enables 'br' Content-Encoding when installed
+except ImportError:
+    brotli = None
+
+try:
+    from PIL import Image, ImageOps  # Optional - enables document thumbnails
+except ImportError:
+    Image = None
+
 app = Flask(__name__)
 CORS(app)  # Enable CORS for React frontend
 app.config['SECRET_KEY'] = 'your-secret-key-here'  # Change this in production
+app.config['USE_X_SENDFILE'] = False  # Set to True when behind a server with X-Sendfile support
 
 # Database configuration
 DB_CONFIG = {
@@ -22,6 +39,190 @@ DB_CONFIG = {
 def get_db_connection():
     return mysql.connector.connect(**DB_CONFIG)
 
+# Response caching configuration
+COMPRESS_MIN_SIZE = 1024  # Only compress JSON bodies larger than this (bytes)
+DETAIL_CACHE_SIZE = 256  # Max application detail payloads kept in memory
+
+# Document serving configuration
+UPLOAD_DIR = 'uploads'
+THUMBNAIL_DIR = os.path.join(UPLOAD_DIR, 'thumbnails')
+THUMBNAIL_SIZES = {'thumb': (200, 200), 'preview': (1024, 1024)}
+THUMBNAIL_WAIT = 1  # Seconds a request waits for a thumbnail before answering 503
+THUMBNAIL_RETRY_AFTER = 2  # Seconds clients should wait before asking again
+DOCUMENT_MAX_AGE = 365 * 24 * 3600  # Uploaded files never change once saved
+FALLBACK_MAX_AGE = 300  # Originals served in place of a thumbnail may be replaced later
+
+# Bounded pool so thumbnail generation can't starve request threads
+thumbnail_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix='thumbnail')
+thumbnail_jobs = {}
+thumbnail_failures = {}  # thumbnail path -> source mtime that failed to convert
+thumbnail_jobs_lock = threading.RLock()
+
+# Analytics dimensions that can be grouped by, mapped to application_rollups SQL
+ANALYTICS_DIMENSIONS = {
+    'day': 'day',
+    'week': 'DATE_SUB(day, INTERVAL WEEKDAY(day) DAY)',
+    'month': 'DATE_SUB(day, INTERVAL DAYOFMONTH(day) - 1 DAY)',
+    'station': 'station',
+    'constituency': 'constituency',
+    'application_type': 'application_type',
+    'status': 'status'
+}
+ANALYTICS_FILTERS = ['station', 'constituency', 'application_type', 'status']
+
+# Hot application detail payloads, keyed by application id
+detail_cache = OrderedDict()
+detail_cache_lock = threading.Lock()
+
+def bump_table_version(cursor, table_name):
+    """Mark a table as changed - call inside the same transaction as the write"""
+    cursor.execute("""
+        INSERT INTO table_versions (table_name, version) VALUES (%s, 1)
+        ON DUPLICATE KEY UPDATE version = version + 1, updated_at = CURRENT_TIMESTAMP
+    """, (table_name,))
+
+def get_table_version(conn, table_name):
+    """Return (version, changed_at epoch seconds) for a table, used to validate cached listings"""
+    cursor = conn.cursor()
+    cursor.execute("""
+        SELECT version, UNIX_TIMESTAMP(updated_at) FROM table_versions WHERE table_name = %s
+    """, (table_name,))
+    row = cursor.fetchone()
+    cursor.close()
+    return row if row else (0, None)
+
+def to_http_date(epoch_seconds):
+    # Validators come from UNIX_TIMESTAMP() on MySQL-written columns, so they
+    # don't depend on the app host's or the MySQL session's time zone
+    return datetime.fromtimestamp(int(epoch_seconds), timezone.utc) if epoch_seconds else None
+
+def is_not_modified(etag, last_modified):
+    """Check the request's conditional headers against the current validators"""
+    if request.if_none_match:
+        return request.if_none_match.contains_weak(etag)
+    if last_modified and request.if_modified_since:
+        return last_modified.replace(microsecond=0) <= request.if_modified_since
+    return False
+
+def add_cache_headers(response, etag, last_modified):
+    """Attach validators so browsers can revalidate instead of re-downloading"""
+    response.set_etag(etag, weak=True)
+    if last_modified:
+        response.last_modified = last_modified
+    # Let browsers keep a copy but always revalidate it
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response
+
+def not_modified_response(etag, last_modified):
+    return add_cache_headers(app.response_class(status=304), etag, last_modified)
+
+def get_cached_detail(application_id, version):
+    with detail_cache_lock:
+        entry = detail_cache.get(application_id)
+        if not entry or entry['version'] != version:
+            return None
+        detail_cache.move_to_end(application_id)
+        return entry['application']
+
+def set_cached_detail(application_id, version, application):
+    with detail_cache_lock:
+        detail_cache[application_id] = {'version': version, 'application': application}
+        detail_cache.move_to_end(application_id)
+        while len(detail_cache) > DETAIL_CACHE_SIZE:
+            detail_cache.popitem(last=False)
+
+def get_token_payload():
+    """Decode the JWT from the Authorization: Bearer header"""
+    auth_header = request.headers.get('Authorization', '')
+    if not auth_header.startswith('Bearer '):
+        return None
+    token = auth_header[7:]
+    
+    try:
+        return jwt.decode(token, app.config['SECRET_KEY'], algorithms=['HS256'])
+    except jwt.InvalidTokenError:
+        return None
+
+def generate_thumbnail(source_path, thumbnail_path, size):
+    os.makedirs(os.path.dirname(thumbnail_path), exist_ok=True)
+    with Image.open(source_path) as image:
+        image = ImageOps.exif_transpose(image)
+        image.thumbnail(size)
+        if image.mode not in ('RGB', 'L'):
+            image = image.convert('RGB')
+        # Write to a temp file first so readers never see a partial thumbnail
+        temp_path = f"{thumbnail_path}.tmp"
+        image.save(temp_path, 'JPEG', quality=85, optimize=True)
+    os.replace(temp_path, thumbnail_path)
+
+def get_thumbnail(source_path, size):
+    """Return (path, state) for a thumbnail, generating it on the worker pool if needed
+
+    state is 'ready' when path is the thumbnail, 'pending' while it is still
+    being generated, and 'fallback' when path is the original file because no
+    thumbnail can be made (not an image, Pillow missing or generation failed).
+    """
+    mimetype, _ = mimetypes.guess_type(source_path)
+    if Image is None or not mimetype or not mimetype.startswith('image/'):
+        return source_path, 'fallback'
+    
+    source_mtime = os.path.getmtime(source_path)
+    name = os.path.splitext(os.path.basename(source_path))[0]
+    thumbnail_path = os.path.abspath(os.path.join(THUMBNAIL_DIR, f"{name}_{size}.jpg"))
+    if os.path.exists(thumbnail_path) and os.path.getmtime(thumbnail_path) >= source_mtime:
+        return thumbnail_path, 'ready'
+    
+    # Concurrent requests for the same thumbnail share a single job
+    with thumbnail_jobs_lock:
+        if thumbnail_failures.get(thumbnail_path) == source_mtime:
+            return source_path, 'fallback'
+        job = thumbnail_jobs.get(thumbnail_path)
+        if not job:
+            job = thumbnail_executor.submit(generate_thumbnail, source_path, thumbnail_path, THUMBNAIL_SIZES[size])
+            thumbnail_jobs[thumbnail_path] = job
+            job.add_done_callback(lambda done: finish_thumbnail_job(thumbnail_path, source_mtime, done))
+    
+    # Small images finish almost immediately - anything slower is left to the
+    # pool and the client retries, so request threads never queue behind it
+    try:
+        job.result(timeout=THUMBNAIL_WAIT)
+    except FutureTimeoutError:
+        return source_path, 'pending'
+    except Exception as e:
+        print(f"Thumbnail generation failed for {source_path}: {e}")
+        return source_path, 'fallback'
+    
+    return thumbnail_path, 'ready'
+
+def finish_thumbnail_job(thumbnail_path, source_mtime, job):
+    with thumbnail_jobs_lock:
+        thumbnail_jobs.pop(thumbnail_path, None)
+        if job.exception():
+            # Don't retry a broken image until the file changes
+            thumbnail_failures[thumbnail_path] = source_mtime
+
+@app.after_request
+def compress_response(response):
+    """Compress large JSON responses with brotli or gzip when the client accepts it"""
+    if (response.status_code != 200 or response.direct_passthrough
+            or response.mimetype != 'application/json'
+            or 'Content-Encoding' in response.headers):
+        return response
+    
+    data = response.get_data()
+    if len(data) < COMPRESS_MIN_SIZE:
+        return response
+    
+    response.vary.add('Accept-Encoding')
+    if brotli and request.accept_encodings['br']:
+        response.set_data(brotli.compress(data, quality=5))
+        response.headers['Content-Encoding'] = 'br'
+    elif request.accept_encodings['gzip']:
+        response.set_data(gzip.compress(data, compresslevel=6))
+        response.headers['Content-Encoding'] = 'gzip'
+    
+    return response
+
 # Officer Authentication Routes
 @app.route('/api/officer/signup', methods=['POST'])
 def officer_signup():
@@ -52,6 +253,7 @@ def officer_signup():
             VALUES (%s, %s, %s, %s, %s, %s, 'pending', %s)
         """, (data['idNumber'], data['email'], data['phoneNumber'], 
               data['fullName'], data['station'], hashed_password, datetime.now()))
+        bump_table_version(cursor, 'officers')
         
         conn.commit()
         cursor.close()
@@ -170,6 +372,15 @@ def admin_login():
 def get_pending_officers():
     try:
         conn = get_db_connection()
+        
+        # Skip the query entirely if the client's copy is still current
+        version, changed_at = get_table_version(conn, 'officers')
+        etag = f"officers-{version}"
+        last_modified = to_http_date(changed_at)
+        if is_not_modified(etag, last_modified):
+            conn.close()
+            return not_modified_response(etag, last_modified)
+        
         cursor = conn.cursor(dictionary=True)
         
         cursor.execute("""
@@ -182,7 +393,7 @@ def get_pending_officers():
         cursor.close()
         conn.close()
         
-        return jsonify({'officers': officers}), 200
+        return add_cache_headers(jsonify({'officers': officers}), etag, last_modified), 200
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -194,6 +405,7 @@ def approve_officer(officer_id):
         cursor = conn.cursor()
         
         cursor.execute("UPDATE officers SET status = 'approved' WHERE id = %s", (officer_id,))
+        bump_table_version(cursor, 'officers')
         conn.commit()
         
         cursor.close()
@@ -211,6 +423,7 @@ def reject_officer(officer_id):
         cursor = conn.cursor()
         
         cursor.execute("UPDATE officers SET status = 'rejected' WHERE id = %s", (officer_id,))
+        bump_table_version(cursor, 'officers')
         conn.commit()
         
         cursor.close()
@@ -291,7 +504,7 @@ def submit_application():
         application_id = cursor.lastrowid
         
         # Handle file uploads (only if files were sent)
-        upload_dir = 'uploads'
+        upload_dir = UPLOAD_DIR
         os.makedirs(upload_dir, exist_ok=True)
         
         for file_key, file in files.items():
@@ -316,6 +529,8 @@ def submit_application():
                     VALUES (%s, %s, %s)
                 """, (application_id, doc_type, file_path))
         
+        rollups.record_application(cursor, application_id, 'submitted', 1)
+        bump_table_version(cursor, 'applications')
         conn.commit()
         cursor.close()
         conn.close()
@@ -351,10 +566,82 @@ def track_application(application_number):
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/applications/<int:application_id>/documents/<int:document_id>', methods=['GET'])
+def get_application_document(application_id, document_id):
+    try:
+        token_payload = get_token_payload()
+        if not token_payload:
+            return jsonify({'error': 'Authentication required'}), 401
+        
+        size = request.args.get('size')
+        if size and size not in THUMBNAIL_SIZES:
+            return jsonify({'error': f'size must be one of: {", ".join(THUMBNAIL_SIZES)}'}), 400
+        
+        conn = get_db_connection()
+        cursor = conn.cursor(dictionary=True)
+        
+        cursor.execute("""
+            SELECT d.file_path, a.officer_id
+            FROM documents d
+            JOIN applications a ON d.application_id = a.id
+            WHERE d.id = %s AND d.application_id = %s
+        """, (document_id, application_id))
+        
+        document = cursor.fetchone()
+        cursor.close()
+        conn.close()
+        
+        if not document:
+            return jsonify({'error': 'Document not found'}), 404
+        
+        # Admins can see every application, officers only their own
+        is_admin = token_payload.get('role') == 'admin'
+        is_owner = (token_payload.get('role') == 'officer'
+                    and token_payload.get('officer_id') == document['officer_id'])
+        if not is_admin and not is_owner:
+            return jsonify({'error': 'Not authorized to view this document'}), 403
+        
+        file_path = os.path.abspath(document['file_path'])
+        if not os.path.isfile(file_path):
+            return jsonify({'error': 'Document file not found'}), 404
+        
+        state = 'ready'
+        if size:
+            file_path, state = get_thumbnail(file_path, size)
+            if state == 'pending':
+                response = jsonify({'error': 'Thumbnail is being generated, try again shortly'})
+                response.headers['Retry-After'] = str(THUMBNAIL_RETRY_AFTER)
+                response.headers['Cache-Control'] = 'no-store'
+                return response, 503
+        
+        # send_file handles Range/conditional requests and hands the file to the
+        # server's wsgi.file_wrapper (sendfile) instead of reading it into memory
+        if state == 'ready':
+            response = send_file(file_path, conditional=True, max_age=DOCUMENT_MAX_AGE)
+            response.cache_control.immutable = True
+        else:
+            # Only cache the stand-in original briefly so a later thumbnail replaces it
+            response = send_file(file_path, conditional=True, max_age=FALLBACK_MAX_AGE)
+        response.cache_control.public = False
+        response.cache_control.private = True
+        return response
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 @app.route('/api/admin/applications', methods=['GET'])
 def get_all_applications():
     try:
         conn = get_db_connection()
+        
+        # Skip the query entirely if the client's copy is still current
+        version, changed_at = get_table_version(conn, 'applications')
+        etag = f"applications-{version}"
+        last_modified = to_http_date(changed_at)
+        if is_not_modified(etag, last_modified):
+            conn.close()
+            return not_modified_response(etag, last_modified)
+        
         cursor = conn.cursor(dictionary=True)
         
         cursor.execute("""
@@ -371,7 +658,7 @@ def get_all_applications():
         cursor.close()
         conn.close()
         
-        return jsonify({'applications': applications}), 200
+        return add_cache_headers(jsonify({'applications': applications}), etag, last_modified), 200
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -382,6 +669,33 @@ def get_application_details(application_id):
         conn = get_db_connection()
         cursor = conn.cursor(dictionary=True)
         
+        # Cheap primary key lookup to validate cached copies before the full JOIN
+        cursor.execute("""
+            SELECT UNIX_TIMESTAMP(updated_at) AS updated_ts, row_version
+            FROM applications WHERE id = %s
+        """, (application_id,))
+        row = cursor.fetchone()
+        
+        if not row:
+            cursor.close()
+            conn.close()
+            return jsonify({'error': 'Application not found'}), 404
+        
+        # updated_at only has second precision - row_version changes on every UPDATE
+        version = row['row_version']
+        etag = f"application-{application_id}-{version}"
+        last_modified = to_http_date(row['updated_ts'])
+        if is_not_modified(etag, last_modified):
+            cursor.close()
+            conn.close()
+            return not_modified_response(etag, last_modified)
+        
+        application = get_cached_detail(application_id, version)
+        if application:
+            cursor.close()
+            conn.close()
+            return add_cache_headers(jsonify({'application': application}), etag, last_modified), 200
+        
         # Get application details
         cursor.execute("""
             SELECT a.*, o.full_name as officer_name
@@ -399,7 +713,7 @@ def get_application_details(application_id):
         
         # Get supporting documents
         cursor.execute("""
-            SELECT document_type, file_path
+            SELECT id, document_type, file_path
             FROM documents WHERE application_id = %s
         """, (application_id,))
         
@@ -409,7 +723,9 @@ def get_application_details(application_id):
         cursor.close()
         conn.close()
         
-        return jsonify({'application': application}), 200
+        set_cached_detail(application_id, application['row_version'], application)
+        
+        return add_cache_headers(jsonify({'application': application}), etag, last_modified), 200
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -420,6 +736,14 @@ def approve_application(application_id):
         conn = get_db_connection()
         cursor = conn.cursor(dictionary=True)
         
+        # Lock the row and remember its status for the analytics rollups
+        cursor.execute("SELECT status FROM applications WHERE id = %s FOR UPDATE", (application_id,))
+        current = cursor.fetchone()
+        if not current:
+            cursor.close()
+            conn.close()
+            return jsonify({'error': 'Application not found'}), 404
+        
         # Generate ID number
         cursor.execute("SELECT COUNT(*) as count FROM applications WHERE status = 'approved'")
         count = cursor.fetchone()['count']
@@ -428,15 +752,17 @@ def approve_application(application_id):
         # Update application status and assign ID number
         cursor.execute("""
             UPDATE applications 
-            SET status = 'approved', generated_id_number = %s, updated_at = %s
+            SET status = 'approved', generated_id_number = %s, updated_at = CURRENT_TIMESTAMP, row_version = row_version + 1
             WHERE id = %s
-        """, (id_number, datetime.now(), application_id))
+        """, (id_number, application_id))
         
         if cursor.rowcount == 0:
             cursor.close()
             conn.close()
             return jsonify({'error': 'Application not found'}), 404
         
+        rollups.record_status_change(cursor, application_id, current['status'], 'approved')
+        bump_table_version(cursor, 'applications')
         conn.commit()
         cursor.close()
         conn.close()
@@ -455,18 +781,28 @@ def reject_application(application_id):
         conn = get_db_connection()
         cursor = conn.cursor(dictionary=True)
         
+        # Lock the row and remember its status for the analytics rollups
+        cursor.execute("SELECT status FROM applications WHERE id = %s FOR UPDATE", (application_id,))
+        current = cursor.fetchone()
+        if not current:
+            cursor.close()
+            conn.close()
+            return jsonify({'error': 'Application not found'}), 404
+        
         # Update application status
         cursor.execute("""
             UPDATE applications 
-            SET status = 'rejected', updated_at = %s
+            SET status = 'rejected', updated_at = CURRENT_TIMESTAMP, row_version = row_version + 1
             WHERE id = %s
-        """, (datetime.now(), application_id))
+        """, (application_id,))
         
         if cursor.rowcount == 0:
             cursor.close()
             conn.close()
             return jsonify({'error': 'Application not found'}), 404
         
+        rollups.record_status_change(cursor, application_id, current['status'], 'rejected')
+        bump_table_version(cursor, 'applications')
         conn.commit()
         cursor.close()
         conn.close()
@@ -476,10 +812,87 @@ def reject_application(application_id):
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/admin/analytics', methods=['GET'])
+def get_analytics():
+    try:
+        # e.g. ?group_by=day,status&from=2024-01-01&to=2024-01-31&station=Nairobi
+        group_by = list(dict.fromkeys(d.strip() for d in request.args.get('group_by', 'day').split(',') if d.strip()))
+        invalid = [d for d in group_by if d not in ANALYTICS_DIMENSIONS]
+        if invalid:
+            return jsonify({'error': f'Invalid group_by: {", ".join(invalid)}. '
+                                     f'Allowed: {", ".join(ANALYTICS_DIMENSIONS)}'}), 400
+        
+        conditions = []
+        params = []
+        for arg, condition in (('from', 'day >= %s'), ('to', 'day <= %s')):
+            if request.args.get(arg):
+                try:
+                    params.append(datetime.strptime(request.args[arg], '%Y-%m-%d').date())
+                except ValueError:
+                    return jsonify({'error': f'{arg} must be a date in YYYY-MM-DD format'}), 400
+                conditions.append(condition)
+        for field in ANALYTICS_FILTERS:
+            if request.args.get(field):
+                conditions.append(f'{field} = %s')
+                params.append(request.args[field])
+        
+        conn = get_db_connection()
+        
+        # Bumped by every rollup write and by rebuilds
+        version, changed_at = get_table_version(conn, rollups.ROLLUP_TABLE)
+        etag = f"analytics-{version}"
+        last_modified = to_http_date(changed_at)
+        if is_not_modified(etag, last_modified):
+            conn.close()
+            return not_modified_response(etag, last_modified)
+        
+        cursor = conn.cursor(dictionary=True)
+        
+        select_columns = [f'{ANALYTICS_DIMENSIONS[d]} AS {d}' for d in group_by]
+        group_columns = ', '.join(group_by)
+        query = f"""
+            SELECT {', '.join(select_columns + ['SUM(application_count) AS count'])}
+            FROM {rollups.ROLLUP_TABLE}
+            {'WHERE ' + ' AND '.join(conditions) if conditions else ''}
+            {'GROUP BY ' + group_columns if group_by else ''}
+            {'HAVING count <> 0' if group_by else ''}
+            {'ORDER BY ' + group_columns if group_by else ''}
+        """
+        cursor.execute(query, tuple(params))
+        results = cursor.fetchall()
+        
+        cursor.close()
+        conn.close()
+        
+        # Format dates and SUM() decimals for the frontend
+        for row in results:
+            row['count'] = int(row['count'] or 0)
+            for dimension in ('day', 'week', 'month'):
+                if row.get(dimension):
+                    row[dimension] = row[dimension].isoformat()
+        
+        return add_cache_headers(jsonify({
+            'groupBy': group_by,
+            'results': results,
+            'total': sum(row['count'] for row in results)
+        }), etag, last_modified), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 @app.route('/api/admin/applications/approved', methods=['GET'])
 def get_approved_applications():
     try:
         conn = get_db_connection()
+        
+        # Skip the query entirely if the client's copy is still current
+        version, changed_at = get_table_version(conn, 'applications')
+        etag = f"applications-{version}"
+        last_modified = to_http_date(changed_at)
+        if is_not_modified(etag, last_modified):
+            conn.close()
+            return not_modified_response(etag, last_modified)
+        
         cursor = conn.cursor(dictionary=True)
         
         query = """
@@ -497,7 +910,7 @@ def get_approved_applications():
         cursor.close()
         conn.close()
         
-        return jsonify({'applications': applications}), 200
+        return add_cache_headers(jsonify({'applications': applications}), etag, last_modified), 200
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -511,15 +924,17 @@ def dispatch_application(application_id):
         # Update application status to dispatched
         cursor.execute("""
             UPDATE applications 
-            SET status = 'dispatched', updated_at = %s
+            SET status = 'dispatched', updated_at = CURRENT_TIMESTAMP, row_version = row_version + 1
             WHERE id = %s AND status = 'approved'
-        """, (datetime.now(), application_id))
+        """, (application_id,))
         
         if cursor.rowcount == 0:
             cursor.close()
             conn.close()
             return jsonify({'error': 'Application not found or not approved'}), 404
         
+        rollups.record_status_change(cursor, application_id, 'approved', 'dispatched')
+        bump_table_version(cursor, 'applications')
         conn.commit()
         cursor.close()
         conn.close()
@@ -538,6 +953,15 @@ def get_officer_applications():
             return jsonify({'error': 'Officer ID is required'}), 400
         
         conn = get_db_connection()
+        
+        # Skip the query entirely if the client's copy is still current
+        version, changed_at = get_table_version(conn, 'applications')
+        etag = f"applications-{version}"
+        last_modified = to_http_date(changed_at)
+        if is_not_modified(etag, last_modified):
+            conn.close()
+            return not_modified_response(etag, last_modified)
+        
         cursor = conn.cursor(dictionary=True)
         
         cursor.execute("""
@@ -561,7 +985,7 @@ def get_officer_applications():
         cursor.close()
         conn.close()
         
-        return jsonify(applications), 200
+        return add_cache_headers(jsonify(applications), etag, last_modified), 200
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -574,15 +998,16 @@ def update_card_arrived(application_id):
         
         cursor.execute("""
             UPDATE applications 
-            SET card_arrived = 1, updated_at = %s
+            SET card_arrived = 1, updated_at = CURRENT_TIMESTAMP, row_version = row_version + 1
             WHERE id = %s AND status = 'approved'
-        """, (datetime.now(), application_id))
+        """, (application_id,))
         
         if cursor.rowcount == 0:
             cursor.close()
             conn.close()
             return jsonify({'error': 'Application not found or not approved'}), 404
         
+        bump_table_version(cursor, 'applications')
         conn.commit()
         cursor.close()
         conn.close()
@@ -600,15 +1025,16 @@ def update_collected(application_id):
         
         cursor.execute("""
             UPDATE applications 
-            SET collected = 1, updated_at = %s
+            SET collected = 1, updated_at = CURRENT_TIMESTAMP, row_version = row_version + 1
             WHERE id = %s AND status = 'approved' AND card_arrived = 1
-        """, (datetime.now(), application_id))
+        """, (application_id,))
         
         if cursor.rowcount == 0:
             cursor.close()
             conn.close()
             return jsonify({'error': 'Application not found, not approved, or card not arrived'}), 404
         
+        bump_table_version(cursor, 'applications')
         conn.commit()
         cursor.close()
         conn.close()
@@ -623,6 +1049,15 @@ def update_collected(application_id):
 def get_renewal_applications():
     try:
         conn = get_db_connection()
+        
+        # Skip the query entirely if the client's copy is still current
+        version, changed_at = get_table_version(conn, 'applications')
+        etag = f"applications-{version}"
+        last_modified = to_http_date(changed_at)
+        if is_not_modified(etag, last_modified):
+            conn.close()
+            return not_modified_response(etag, last_modified)
+        
         cursor = conn.cursor(dictionary=True)
         
         cursor.execute("""
@@ -647,7 +1082,7 @@ def get_renewal_applications():
         cursor.close()
         conn.close()
         
-        return jsonify({'applications': applications}), 200
+        return add_cache_headers(jsonify({'applications': applications}), etag, last_modified), 200
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -1,5 +1,8 @@
 -- Digital ID System Database Schema
--- Run this SQL script in your MySQL database
+-- Run this SQL script in your MySQL database, then run `python migrate.py`
+-- to apply later schema changes (migrate.py is safe to run at every deploy).
+-- migrate.py must run before app.py starts: it creates tables the app writes
+-- to on every submit/status change (e.g. application_rollups).
 
 CREATE DATABASE IF NOT EXISTS digital_id_system;
 USE digital_id_system;
@@ -75,6 +78,9 @@ CREATE TABLE applications (
     card_arrived BOOLEAN DEFAULT FALSE,
     collected BOOLEAN DEFAULT FALSE,
     
+    -- Incremented by every UPDATE, used as the application detail ETag
+    row_version INT UNSIGNED NOT NULL DEFAULT 0,
+    
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
     
@@ -121,15 +127,24 @@ CREATE TABLE status_history (
     FOREIGN KEY (changed_by_officer_id) REFERENCES officers(id)
 );
 
+-- Table versions (bumped on every write, used for ETag/conditional GET validation)
+CREATE TABLE table_versions (
+    table_name VARCHAR(64) PRIMARY KEY,
+    version BIGINT UNSIGNED NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+);
+
+INSERT INTO table_versions (table_name, version) VALUES ('officers', 0), ('applications', 0);
+
 -- Insert default admin user
 INSERT INTO admins (username, full_name, password_hash) 
 VALUES ('admin', 'System Administrator', '$2b$12$LQv3c1yqBWVHxkd0LHAkCOYz6TtxMQJqhN8/LewfT1bfaXHOGTCK2');
 -- Default username: 'admin', password: 'admin123' - change this immediately
 
 -- Create indexes for better performance
-CREATE INDEX idx_officers_email ON officers(email);
+-- (email and application_number are already indexed by their UNIQUE keys)
 CREATE INDEX idx_officers_status ON officers(status);
-CREATE INDEX idx_applications_number ON applications(application_number);
-CREATE INDEX idx_applications_status ON applications(status);
-CREATE INDEX idx_applications_officer ON applications(officer_id);
+CREATE INDEX idx_applications_status_created ON applications(status, created_at);
+CREATE INDEX idx_applications_officer_created ON applications(officer_id, created_at);
+CREATE INDEX idx_applications_updated ON applications(updated_at);
 CREATE INDEX idx_documents_application ON documents(application_id);
\ No newline at end of file
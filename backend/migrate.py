@@ -0,0 +1,371 @@
+#!/usr/bin/env python3
+"""
+Schema migration runner for the Digital ID system
+Run this script at every deploy - migrations that were already applied are skipped
+
+Usage:
+    python migrate.py                   Apply pending migrations
+    python migrate.py status            Show applied and pending migrations
+    python migrate.py rebuild-rollups   Recompute analytics rollups from applications
+
+database_setup.sql creates the original schema; every change after that
+belongs here as a new numbered migration appended to MIGRATIONS.
+"""
+
+import mysql.connector
+import sys
+import time
+
+import rollups
+
+# Database configuration
+DB_CONFIG = {
+    'host': 'localhost',
+    'user': 'root',  # Your MySQL username
+    'password': '',  # Your MySQL password
+    'database': 'digital_id_system'
+}
+
+BATCH_SIZE = 1000  # Rows per backfill batch
+BATCH_PAUSE = 0.1  # Seconds to sleep between batches so live traffic keeps up
+LOCK_WAIT_TIMEOUT = 5  # Seconds DDL may wait for a metadata lock before retrying
+DDL_RETRIES = 5
+MIGRATION_LOCK = 'digital_id_system_migrations'
+CATCH_UP_MARGIN = 300  # Seconds before a rollup rebuild starts that its catch-up re-checks
+
+# Helpers - every step checks the current schema first so a migration that
+# failed half way can simply be run again
+
+def get_indexes(cursor, table):
+    """Return {index_name: [columns in order]} for a table"""
+    cursor.execute("""
+        SELECT index_name, column_name
+        FROM information_schema.statistics
+        WHERE table_schema = DATABASE() AND table_name = %s
+        ORDER BY index_name, seq_in_index
+    """, (table,))
+    indexes = {}
+    for index_name, column_name in cursor.fetchall():
+        indexes.setdefault(index_name, []).append(column_name)
+    return indexes
+
+def table_exists(cursor, table):
+    cursor.execute("""
+        SELECT COUNT(*) FROM information_schema.tables
+        WHERE table_schema = DATABASE() AND table_name = %s
+    """, (table,))
+    return cursor.fetchone()[0] > 0
+
+def column_exists(cursor, table, column):
+    cursor.execute("""
+        SELECT COUNT(*) FROM information_schema.columns
+        WHERE table_schema = DATABASE() AND table_name = %s AND column_name = %s
+    """, (table, column))
+    return cursor.fetchone()[0] > 0
+
+def run_online_ddl(cursor, statement):
+    """Run an ALTER without blocking reads/writes, backing off if the table is busy"""
+    for attempt in range(1, DDL_RETRIES + 1):
+        try:
+            cursor.execute(f"{statement}, ALGORITHM=INPLACE, LOCK=NONE")
+            return
+        except mysql.connector.Error as e:
+            # 1205 = lock wait timeout: a long transaction holds the table, try again later
+            if e.errno != 1205 or attempt == DDL_RETRIES:
+                raise
+            print(f"    Table busy, retrying ({attempt}/{DDL_RETRIES})...")
+            time.sleep(attempt * 2)
+
+def create_table(cursor, table, definition):
+    if table_exists(cursor, table):
+        print(f"    Table {table} already exists")
+        return
+    cursor.execute(f"CREATE TABLE {table} ({definition})")
+    print(f"    Created table {table}")
+
+def add_column(cursor, table, column, definition):
+    if column_exists(cursor, table, column):
+        print(f"    Column {table}.{column} already exists")
+        return
+    run_online_ddl(cursor, f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+    print(f"    Added column {table}.{column}")
+
+def add_index(cursor, table, index_name, columns):
+    if index_name in get_indexes(cursor, table):
+        print(f"    Index {index_name} already exists")
+        return
+    run_online_ddl(cursor, f"ALTER TABLE {table} ADD INDEX {index_name} ({', '.join(columns)})")
+    print(f"    Added index {index_name} on {table}({', '.join(columns)})")
+
+def drop_redundant_index(cursor, table, index_name):
+    """Drop an index only if another index starts with the same columns"""
+    indexes = get_indexes(cursor, table)
+    columns = indexes.pop(index_name, None)
+    if columns is None:
+        print(f"    Index {index_name} already dropped")
+        return
+
+    covering = [name for name, cols in indexes.items() if cols[:len(columns)] == columns]
+    if not covering:
+        print(f"    Keeping {index_name}: no other index covers ({', '.join(columns)})")
+        return
+
+    run_online_ddl(cursor, f"ALTER TABLE {table} DROP INDEX {index_name}")
+    print(f"    Dropped {index_name} (covered by {covering[0]})")
+
+def backfill(conn, table, description, process_batch):
+    """Call process_batch(cursor, first_id, last_id) over a table's id range in throttled batches
+
+    Each batch is committed on its own, so process_batch must be safe to
+    repeat for a range if the migration is re-run after a failure (write
+    into a scratch table or use upserts). See rebuild_rollups for a caller.
+    """
+    cursor = conn.cursor()
+    cursor.execute(f"SELECT MIN(id), MAX(id) FROM {table}")
+    min_id, max_id = cursor.fetchone()
+    if min_id is None:
+        print(f"    {description}: {table} is empty, nothing to do")
+        cursor.close()
+        return
+
+    total = max_id - min_id + 1
+    first_id = min_id
+    while first_id <= max_id:
+        last_id = min(first_id + BATCH_SIZE - 1, max_id)
+        process_batch(cursor, first_id, last_id)
+        # Commit each batch so locks are held only briefly
+        conn.commit()
+
+        done = last_id - min_id + 1
+        print(f"    {description}: {done}/{total} ids ({done * 100 // total}%)")
+        first_id = last_id + 1
+        time.sleep(BATCH_PAUSE)
+
+    cursor.close()
+
+# Migrations
+
+def create_table_versions(conn, cursor):
+    create_table(cursor, 'table_versions', """
+        table_name VARCHAR(64) PRIMARY KEY,
+        version BIGINT UNSIGNED NOT NULL DEFAULT 0,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+    """)
+    cursor.execute("""
+        INSERT IGNORE INTO table_versions (table_name, version)
+        VALUES ('officers', 0), ('applications', 0)
+    """)
+    conn.commit()
+
+def add_listing_indexes(conn, cursor):
+    # Admin listings filter by status, officer dashboards by officer - both sort by created_at
+    add_index(cursor, 'applications', 'idx_applications_status_created', ['status', 'created_at'])
+    add_index(cursor, 'applications', 'idx_applications_officer_created', ['officer_id', 'created_at'])
+
+def drop_redundant_indexes(conn, cursor):
+    # Duplicates of UNIQUE keys, and single-column indexes now covered by the composites above
+    drop_redundant_index(cursor, 'applications', 'idx_applications_number')
+    drop_redundant_index(cursor, 'officers', 'idx_officers_email')
+    drop_redundant_index(cursor, 'applications', 'idx_applications_status')
+    drop_redundant_index(cursor, 'applications', 'idx_applications_officer')
+
+def rebuild_rollups(conn, cursor):
+    """Recompute application_rollups from applications without losing live updates
+
+    Applications are aggregated into a shadow table in throttled id-range
+    batches while app.py keeps updating the live table. Rollup writers are
+    then paused by locking the application_rollups table_versions row, which
+    app.py takes before every rollup write. The buckets of applications added
+    or changed since the rebuild started are recomputed in the shadow table,
+    and the result is copied into the live table in one transaction.
+
+    Changed buckets are found with plain (non-locking) SELECTs and recomputed
+    by joining a temporary key table, so the rebuild never holds locks on
+    application rows that writers are waiting behind.
+    """
+    shadow_table = f"{rollups.ROLLUP_TABLE}_rebuild"
+
+    create_table(cursor, rollups.ROLLUP_TABLE, rollups.ROLLUP_COLUMNS)
+    cursor.execute("INSERT IGNORE INTO table_versions (table_name, version) VALUES (%s, 0)",
+                   (rollups.ROLLUP_TABLE,))
+    cursor.execute(f"DROP TABLE IF EXISTS {shadow_table}")
+    cursor.execute(f"CREATE TABLE {shadow_table} ({rollups.ROLLUP_COLUMNS})")
+
+    # Anything added or changed after this point is recomputed in the catch-up
+    # below - the margin covers writes that set updated_at earlier but commit later
+    cursor.execute(f"""
+        SELECT NOW() - INTERVAL {CATCH_UP_MARGIN} SECOND, COALESCE(MAX(id), 0) FROM applications
+    """)
+    started_at, max_id = cursor.fetchone()
+    conn.commit()
+
+    backfill(conn, 'applications', f"Aggregating into {shadow_table}",
+             lambda batch_cursor, first_id, last_id: rollups.aggregate_batch(batch_cursor, shadow_table, first_id, last_id))
+
+    # Plain consistent reads, so the catch-up never waits on application rows
+    # locked by writers that are themselves waiting for the rollups lock
+    cursor.execute("SET SESSION TRANSACTION ISOLATION LEVEL READ COMMITTED")
+    try:
+        # First catch-up runs without the lock and picks up nearly everything
+        # that changed during the backfill
+        cursor.execute(f"""
+            SELECT NOW() - INTERVAL {CATCH_UP_MARGIN} SECOND, COALESCE(MAX(id), 0) FROM applications
+        """)
+        recheck_since, recheck_after_id = cursor.fetchone()
+        keys = rollups.find_changed_keys(cursor, max_id, started_at)
+        rollups.reaggregate_keys(cursor, shadow_table, keys)
+        conn.commit()
+        print(f"    Caught up {len(keys)} changed buckets")
+
+        # Final catch-up under the lock only re-checks rows changed since the
+        # first one (indexed by id and updated_at), so writers pause briefly
+        print("    Pausing rollup writers for final catch-up and swap...")
+        cursor.execute("SELECT version FROM table_versions WHERE table_name = %s FOR UPDATE",
+                       (rollups.ROLLUP_TABLE,))
+        cursor.fetchone()
+
+        keys = rollups.find_changed_keys(cursor, recheck_after_id, recheck_since)
+        rollups.reaggregate_keys(cursor, shadow_table, keys)
+        cursor.execute(f"DELETE FROM {rollups.ROLLUP_TABLE}")
+        cursor.execute(f"INSERT INTO {rollups.ROLLUP_TABLE} SELECT * FROM {shadow_table}")
+        # New version so analytics clients drop their cached (pre-rebuild) numbers
+        rollups.bump_rollup_version(cursor)
+        conn.commit()
+    except mysql.connector.Error:
+        conn.rollback()
+        raise
+    finally:
+        cursor.execute("SET SESSION TRANSACTION ISOLATION LEVEL REPEATABLE READ")
+
+    cursor.execute(f"DROP TABLE {shadow_table}")
+    print(f"    Swapped in rebuilt {rollups.ROLLUP_TABLE}")
+
+def create_application_rollups(conn, cursor):
+    # Built from scratch so re-running after a failure never double counts
+    rebuild_rollups(conn, cursor)
+
+def add_applications_row_version(conn, cursor):
+    # Per-row validator for application detail ETags and the detail cache
+    add_column(cursor, 'applications', 'row_version', 'INT UNSIGNED NOT NULL DEFAULT 0')
+
+def add_applications_updated_index(conn, cursor):
+    # Lets the rollup rebuild catch-up find recently changed applications without a table scan
+    add_index(cursor, 'applications', 'idx_applications_updated', ['updated_at'])
+
+MIGRATIONS = [
+    (1, 'create_table_versions', create_table_versions),
+    (2, 'add_listing_indexes', add_listing_indexes),
+    (3, 'drop_redundant_indexes', drop_redundant_indexes),
+    (4, 'create_application_rollups', create_application_rollups),
+    (5, 'add_applications_row_version', add_applications_row_version),
+    (6, 'add_applications_updated_index', add_applications_updated_index),
+]
+
+def ensure_migrations_table(cursor):
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            version INT PRIMARY KEY,
+            name VARCHAR(100) NOT NULL,
+            applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+
+def get_applied_versions(cursor):
+    cursor.execute("SELECT version FROM schema_migrations")
+    return {row[0] for row in cursor.fetchall()}
+
+def acquire_migration_lock(cursor):
+    """Only one migration or rollup rebuild may run at a time"""
+    cursor.execute("SELECT GET_LOCK(%s, 0)", (MIGRATION_LOCK,))
+    if cursor.fetchone()[0] != 1:
+        print("Error: another migration is already running!")
+        return False
+    return True
+
+def release_migration_lock(cursor):
+    cursor.execute("SELECT RELEASE_LOCK(%s)", (MIGRATION_LOCK,))
+    cursor.fetchone()
+
+def migrate():
+    try:
+        conn = mysql.connector.connect(**DB_CONFIG)
+        cursor = conn.cursor()
+
+        if not acquire_migration_lock(cursor):
+            return 1
+
+        cursor.execute("SET SESSION lock_wait_timeout = %s", (LOCK_WAIT_TIMEOUT,))
+        ensure_migrations_table(cursor)
+        applied = get_applied_versions(cursor)
+
+        pending = [m for m in MIGRATIONS if m[0] not in applied]
+        if not pending:
+            print("Database is up to date.")
+
+        for index, (version, name, migration) in enumerate(pending, start=1):
+            print(f"[{index}/{len(pending)}] Applying {version:03d}_{name}...")
+            started = time.time()
+            migration(conn, cursor)
+            cursor.execute("INSERT INTO schema_migrations (version, name) VALUES (%s, %s)", (version, name))
+            conn.commit()
+            print(f"    Done in {time.time() - started:.1f}s")
+
+        release_migration_lock(cursor)
+        cursor.close()
+        conn.close()
+        return 0
+
+    except mysql.connector.Error as e:
+        print(f"Database error: {e}")
+        return 1
+
+def show_status():
+    try:
+        conn = mysql.connector.connect(**DB_CONFIG)
+        cursor = conn.cursor()
+
+        ensure_migrations_table(cursor)
+        applied = get_applied_versions(cursor)
+
+        cursor.close()
+        conn.close()
+
+        print("\n=== Migrations ===")
+        for version, name, _ in MIGRATIONS:
+            state = "applied" if version in applied else "pending"
+            print(f"{version:03d}_{name}: {state}")
+        return 0
+
+    except mysql.connector.Error as e:
+        print(f"Database error: {e}")
+        return 1
+
+def run_rollup_rebuild():
+    try:
+        conn = mysql.connector.connect(**DB_CONFIG)
+        cursor = conn.cursor()
+
+        if not acquire_migration_lock(cursor):
+            return 1
+
+        print(f"Rebuilding {rollups.ROLLUP_TABLE}...")
+        started = time.time()
+        rebuild_rollups(conn, cursor)
+        print(f"Done in {time.time() - started:.1f}s")
+
+        release_migration_lock(cursor)
+        cursor.close()
+        conn.close()
+        return 0
+
+    except mysql.connector.Error as e:
+        print(f"Database error: {e}")
+        return 1
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "status":
+        sys.exit(show_status())
+    elif len(sys.argv) > 1 and sys.argv[1] == "rebuild-rollups":
+        sys.exit(run_rollup_rebuild())
+    else:
+        sys.exit(migrate())
@@ -0,0 +1,119 @@
+"""
+Pre-aggregated application counts for the admin analytics endpoint
+
+application_rollups holds one row per (day, station, constituency, type, status)
+with the number of applications in it. app.py keeps it current on every insert
+and status change; `python migrate.py rebuild-rollups` recomputes it from scratch.
+
+Every rollup write first bumps the application_rollups row in table_versions.
+That row lock is held until commit, which gives analytics its ETag and lets a
+rebuild pause writers while it swaps in the recomputed counts.
+"""
+
+from datetime import timedelta
+
+ROLLUP_TABLE = 'application_rollups'
+
+ROLLUP_COLUMNS = """
+    day DATE NOT NULL,
+    station VARCHAR(100) NOT NULL,
+    constituency VARCHAR(100) NOT NULL,
+    application_type ENUM('new', 'renewal') NOT NULL,
+    status VARCHAR(32) NOT NULL,
+    application_count INT NOT NULL DEFAULT 0,
+    PRIMARY KEY (day, station, constituency, application_type, status)
+"""
+
+# Applications without an officer are grouped under an empty station
+ROLLUP_KEY_SQL = "DATE(a.created_at), COALESCE(o.station, ''), a.constituency, a.application_type"
+
+def bump_rollup_version(cursor):
+    cursor.execute("""
+        INSERT INTO table_versions (table_name, version) VALUES (%s, 1)
+        ON DUPLICATE KEY UPDATE version = version + 1, updated_at = CURRENT_TIMESTAMP
+    """, (ROLLUP_TABLE,))
+
+def record_application(cursor, application_id, status, delta):
+    """Add delta to the rollup bucket an application falls into for the given status"""
+    # Take the version lock before touching rollup rows so writers and
+    # rebuilds always lock in the same order
+    bump_rollup_version(cursor)
+    cursor.execute(f"""
+        INSERT INTO {ROLLUP_TABLE} (day, station, constituency, application_type, status, application_count)
+        SELECT {ROLLUP_KEY_SQL}, %s, %s
+        FROM applications a
+        LEFT JOIN officers o ON a.officer_id = o.id
+        WHERE a.id = %s
+        ON DUPLICATE KEY UPDATE application_count = application_count + VALUES(application_count)
+    """, (status, delta, application_id))
+
+def record_status_change(cursor, application_id, old_status, new_status):
+    """Move an application between status buckets - call in the same transaction as the UPDATE"""
+    if old_status == new_status:
+        return
+    record_application(cursor, application_id, old_status, -1)
+    record_application(cursor, application_id, new_status, 1)
+
+def aggregate_batch(cursor, table, first_id, last_id):
+    """Add the counts for applications first_id..last_id into table"""
+    cursor.execute(f"""
+        INSERT INTO {table} (day, station, constituency, application_type, status, application_count)
+        SELECT {ROLLUP_KEY_SQL}, a.status, COUNT(*)
+        FROM applications a
+        LEFT JOIN officers o ON a.officer_id = o.id
+        WHERE a.id BETWEEN %s AND %s
+        GROUP BY {ROLLUP_KEY_SQL}, a.status
+        ON DUPLICATE KEY UPDATE application_count = application_count + VALUES(application_count)
+    """, (first_id, last_id))
+
+def find_changed_keys(cursor, after_id, changed_since):
+    """Return the rollup keys of applications added after after_id or updated since
+    changed_since - a plain SELECT, so it never takes row locks on applications"""
+    cursor.execute(f"""
+        SELECT DISTINCT {ROLLUP_KEY_SQL}
+        FROM applications a
+        LEFT JOIN officers o ON a.officer_id = o.id
+        WHERE a.id > %s OR a.updated_at >= %s
+    """, (after_id, changed_since))
+    return cursor.fetchall()
+
+def reaggregate_keys(cursor, table, keys):
+    """Recompute, in table, the buckets for the given (day, station, constituency, type) keys"""
+    if not keys:
+        return
+    
+    # Session-private scratch table, so the DELETE below only reads rows nobody else can lock
+    cursor.execute("""
+        CREATE TEMPORARY TABLE IF NOT EXISTS rollup_changed_keys (
+            day DATE NOT NULL,
+            station VARCHAR(100) NOT NULL,
+            constituency VARCHAR(100) NOT NULL,
+            application_type VARCHAR(16) NOT NULL,
+            PRIMARY KEY (day, station, constituency, application_type)
+        )
+    """)
+    cursor.execute("DELETE FROM rollup_changed_keys")
+    cursor.executemany("""
+        INSERT INTO rollup_changed_keys (day, station, constituency, application_type)
+        VALUES (%s, %s, %s, %s)
+    """, keys)
+    
+    cursor.execute(f"""
+        DELETE r FROM {table} r
+        JOIN rollup_changed_keys k
+          ON r.day = k.day AND r.station = k.station
+         AND r.constituency = k.constituency AND r.application_type = k.application_type
+    """)
+    # The created_at range keeps this to the affected days instead of the whole table
+    days = [key[0] for key in keys]
+    cursor.execute(f"""
+        INSERT INTO {table} (day, station, constituency, application_type, status, application_count)
+        SELECT {ROLLUP_KEY_SQL}, a.status, COUNT(*)
+        FROM applications a
+        LEFT JOIN officers o ON a.officer_id = o.id
+        JOIN rollup_changed_keys k
+          ON DATE(a.created_at) = k.day AND COALESCE(o.station, '') = k.station
+         AND a.constituency = k.constituency AND a.application_type = k.application_type
+        WHERE a.created_at >= %s AND a.created_at < %s
+        GROUP BY {ROLLUP_KEY_SQL}, a.status
+    """, (min(days), max(days) + timedelta(days=1)))
@@ -42,6 +42,7 @@ interface Application {
   created_at: string;
   officer_name: string;
   documents: Array<{
+    id: number;
     document_type: string;
     file_path: string;
   }>;
@@ -84,6 +85,43 @@ const ApplicationDetails = ({ applicationId, open, onClose, onUpdate }: Applicat
     }
   };
 
+  const handleViewDocument = async (documentId: number) => {
+    // Open the tab synchronously so popup blockers allow it, then load the blob into it
+    const previewWindow = window.open('', '_blank');
+    try {
+      let response: Response;
+      // The server answers 503 + Retry-After while the preview is still being generated
+      for (let attempt = 0; ; attempt++) {
+        response = await fetch(
+          `http://localhost:5000/api/applications/${applicationId}/documents/${documentId}?size=preview`,
+          { headers: { Authorization: `Bearer ${localStorage.getItem('adminToken')}` } }
+        );
+        if (response.status !== 503 || attempt >= 5) {
+          break;
+        }
+        const retryAfter = Number(response.headers.get('Retry-After')) || 2;
+        await new Promise((resolve) => setTimeout(resolve, retryAfter * 1000));
+      }
+
+      if (!response.ok) {
+        throw new Error('Failed to load document');
+      }
+
+      const blobUrl = URL.createObjectURL(await response.blob());
+      if (previewWindow) {
+        previewWindow.location.href = blobUrl;
+      }
+      setTimeout(() => URL.revokeObjectURL(blobUrl), 60000);
+    } catch (error) {
+      previewWindow?.close();
+      toast({
+        title: "Error",
+        description: "Failed to load document",
+        variant: "destructive",
+      });
+    }
+  };
+
   const handleApprove = async () => {
     try {
       const response = await fetch(`http://localhost:5000/api/admin/applications/${applicationId}/approve`, {
@@ -325,7 +363,7 @@ const ApplicationDetails = ({ applicationId, open, onClose, onUpdate }: Applicat
                     <Button 
                       variant="outline" 
                       size="sm"
-                      onClick={() => window.open(`http://localhost:5000/uploads/${doc.file_path.split('/').pop()}`, '_blank')}
+                      onClick={() => handleViewDocument(doc.id)}
                     >
                       View
                     </Button>